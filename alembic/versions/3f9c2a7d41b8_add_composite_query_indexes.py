@@ -0,0 +1,32 @@
+"""Add composite query indexes
+
+Revision ID: 3f9c2a7d41b8
+Revises: a92f6e1c3d58
+Create Date: 2026-10-15 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = '3f9c2a7d41b8'
+down_revision: Union[str, None] = 'a92f6e1c3d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_status', 'tasks', ['user_id', 'status'], unique=False)
+    op.create_index('ix_tasks_user_due_date', 'tasks', ['user_id', 'due_date'], unique=False)
+    op.create_index('ix_tasks_user_updated_at', 'tasks', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_chat_messages_conversation_timestamp', 'chat_messages', ['conversation_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_conversation_timestamp', table_name='chat_messages')
+    op.drop_index('ix_tasks_user_updated_at', table_name='tasks')
+    op.drop_index('ix_tasks_user_due_date', table_name='tasks')
+    op.drop_index('ix_tasks_user_status', table_name='tasks')
@@ -0,0 +1,31 @@
+"""Task timestamp server defaults
+
+Revision ID: 8b1e4c0f5a27
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-15 10:03:18.552091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = '8b1e4c0f5a27'
+down_revision: Union[str, None] = '3f9c2a7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Batch mode: SQLite cannot ALTER COLUMN, so the table is copied there
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), server_default=sa.func.now())
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), server_default=None)
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), server_default=None)
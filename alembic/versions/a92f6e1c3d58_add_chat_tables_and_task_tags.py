@@ -0,0 +1,60 @@
+"""Add chat tables and task tags
+
+Revision ID: a92f6e1c3d58
+Revises: 6d002353537a
+Create Date: 2026-10-15 09:05:11.204733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = 'a92f6e1c3d58'
+down_revision: Union[str, None] = '6d002353537a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases first built by create_all at startup may already have these
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if 'tags' not in {c['name'] for c in inspector.get_columns('tasks')}:
+        op.add_column('tasks', sa.Column('tags', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    if 'conversations' not in tables:
+        op.create_table('conversations',
+        sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('user_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=200), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_conversations_user_id'), 'conversations', ['user_id'], unique=False)
+
+    if 'chat_messages' not in tables:
+        op.create_table('chat_messages',
+        sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('conversation_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('role', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('content', sqlmodel.sql.sqltypes.AutoString(length=10000), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('tool_call_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_chat_messages_conversation_id'), 'chat_messages', ['conversation_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_chat_messages_conversation_id'), table_name='chat_messages')
+    op.drop_table('chat_messages')
+    op.drop_index(op.f('ix_conversations_user_id'), table_name='conversations')
+    op.drop_table('conversations')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('tags')
@@ -0,0 +1,33 @@
+"""Add MCP task indexes
+
+Revision ID: c47d9e2b6f10
+Revises: 8b1e4c0f5a27
+Create Date: 2026-10-15 11:27:05.904316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = 'c47d9e2b6f10'
+down_revision: Union[str, None] = '8b1e4c0f5a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_created', 'tasks', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_tasks_user_status_created', 'tasks', ['user_id', 'status', 'created_at'], unique=False)
+    op.create_index('ix_tasks_user_title', 'tasks', ['user_id', 'title'], unique=False)
+    # (user_id, status) is a prefix of ix_tasks_user_status_created
+    op.drop_index('ix_tasks_user_status', table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index('ix_tasks_user_status', 'tasks', ['user_id', 'status'], unique=False)
+    op.drop_index('ix_tasks_user_title', table_name='tasks')
+    op.drop_index('ix_tasks_user_status_created', table_name='tasks')
+    op.drop_index('ix_tasks_user_created', table_name='tasks')
@@ -0,0 +1,33 @@
+"""User and conversation timestamp server defaults
+
+Revision ID: e5a83b1d9c62
+Revises: c47d9e2b6f10
+Create Date: 2026-10-15 12:41:52.370885
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = 'e5a83b1d9c62'
+down_revision: Union[str, None] = 'c47d9e2b6f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Batch mode: SQLite cannot ALTER COLUMN, so the tables are copied there
+    for table in ('users', 'conversations'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), server_default=sa.func.now())
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    for table in ('conversations', 'users'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), server_default=None)
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), server_default=None)
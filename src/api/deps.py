@@ -1,42 +1,79 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
-from src.core.security import verify_password, create_access_token
+from src.core.security import verify_password, create_access_token, decode_access_token
 from src.db.session import get_session
 from src.models.user import User
 from src.schemas.user import TokenData
-from src.core.config import settings
 import jwt
+import time
+import uuid
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
+from cachetools import TTLCache
 
 
 security = HTTPBearer()
 
 
-def get_current_user_sync(token: HTTPAuthorizationCredentials = Depends(security), session: Session = Depends(get_session)) -> User:
+@dataclass(slots=True)
+class AuthUser:
+    """The authenticated caller: only the User columns request handlers read."""
+    id: uuid.UUID
+    email: str
+    full_name: str
+    created_at: datetime
+
+# Cache of validated tokens -> (expires_at, AuthUser). Entries live at most
+# TOKEN_CACHE_TTL seconds and never past the token's own "exp" claim.
+TOKEN_CACHE_TTL = 30
+_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL)
+_token_cache_lock = threading.Lock()
+
+
+def get_current_user_sync(token: HTTPAuthorizationCredentials = Depends(security), session: Session = Depends(get_session)) -> AuthUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cache_key = hashlib.sha256(token.credentials.encode()).digest()[:16]
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
     try:
-        payload = jwt.decode(
-            token.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
+        payload = decode_access_token(token.credentials)
+        user_id: str = payload.get("sub")
+        if user_id is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except jwt.exceptions.PyJWTError:
+        token_data = TokenData(user_id=uuid.UUID(user_id))
+    except (jwt.exceptions.PyJWTError, ValueError):
         raise credentials_exception
 
-    statement = select(User).where(User.email == token_data.username)
-    user = session.exec(statement).first()
+    # Project only the columns AuthUser needs (skips password_hash and ORM hydration)
+    statement = select(User.id, User.email, User.full_name, User.created_at).where(
+        User.id == token_data.user_id
+    )
+    row = session.exec(statement).first()
 
-    if user is None:
+    if row is None:
         raise credentials_exception
 
+    user = AuthUser(*row)
+
+    # Only successful validations are cached
+    expires_at = min(now + TOKEN_CACHE_TTL, payload.get("exp", now))
+    if expires_at > now:
+        with _token_cache_lock:
+            _token_cache[cache_key] = (expires_at, user)
+
     return user
 
 
@@ -1,7 +1,9 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 from .endpoints import auth, tasks, agent
 
-router = APIRouter()
+# orjson for every v1 response
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Include all API endpoints
 router.include_router(auth.router, prefix="/auth", tags=["authentication"])
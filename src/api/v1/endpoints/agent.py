@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+import re
 import uuid
 import datetime
 import os
-import json
+import orjson
+import asyncio
+import httpx
+from collections import deque
 from sqlmodel import Session, select, desc
-from openai import OpenAI
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import joinedload
+from openai import AsyncOpenAI
 
 # Internal Imports
-from src.db.session import sync_engine
+from src.db.session import sync_engine, AsyncSessionLocal
 from src.models.chat import Conversation, ChatMessage
 from src.mcp.tools import (
     add_task, 
@@ -31,16 +38,33 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 # 2. Set Default Model (Switched to Llama 3.3 70B which is robust and free)
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "meta-llama/llama-3.3-70b-instruct:free")
 
-# 3. Configure Client for OpenRouter
-client = OpenAI(
+# 3. Shared HTTP/2 connection pool, so tool follow-up calls reuse the open TLS connection
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=httpx.Timeout(60.0, connect=5.0),
+)
+
+# 4. Configure Client for OpenRouter (async, shared across requests)
+client = AsyncOpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=OPENROUTER_API_KEY,
     default_headers={
         "HTTP-Referer": "http://localhost:3000", # Required by OpenRouter
         "X-Title": "Aurora Task Agent", # Optional
-    }
+    },
+    http_client=http_client
 )
 
+# --- ID PARSING ---
+# Canonical 8-4-4-4-12 form; checked before uuid.UUID() so bad input never takes the exception path
+_UUID_RE = re.compile(r"\A[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z")
+
+def _parse_uuid(value: str, detail: str = "Invalid ID") -> uuid.UUID:
+    if not _UUID_RE.match(value):
+        raise HTTPException(status_code=400, detail=detail)
+    return uuid.UUID(value)
+
 # --- REQUEST/RESPONSE MODELS ---
 class ChatRequest(BaseModel):
     message: str
@@ -67,6 +91,25 @@ BEHAVIORAL GUIDELINES:
 4. **Duplicate Handling**: If you find multiple tasks with the same name when deleting, ask the user for clarification using the task IDs provided in the error message.
 """
 
+# Formatted prompt per day, so the template is only rendered once per date
+_PROMPT_CACHE: Dict[str, str] = {}
+
+def _system_prompt_for(day: datetime.date) -> str:
+    today_str = day.isoformat()
+    prompt = _PROMPT_CACHE.get(today_str)
+    if prompt is None:
+        _PROMPT_CACHE.clear()  # Only today's entry is ever needed
+        prompt = _PROMPT_CACHE[today_str] = SYSTEM_PROMPT.format(current_date=today_str)
+    return prompt
+
+# --- HISTORY BUDGET ---
+# Upper bound on history tokens sent per request (system prompt and tools excluded)
+HISTORY_TOKEN_BUDGET = 4000
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; no tokenizer needed for a budget
+    return len(text) // 4 + 1
+
 # --- TOOLS SCHEMA (Cleaned for compatibility) ---
 TOOLS_SCHEMA = [
     {
@@ -184,9 +227,85 @@ TOOLS_SCHEMA = [
     }
 ]
 
+# --- TOOL DISPATCH ---
+# Tool name (as exposed in TOOLS_SCHEMA) -> implementation
+_TOOL_TABLE: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "add_task": add_task,
+    "update_task": update_task_by_title,
+    "list_tasks": list_tasks,
+    "delete_task": delete_task,
+    "delete_all_tasks": delete_all_tasks,
+    "complete_all_tasks": complete_all_tasks,
+    "mark_all_tasks_incomplete": mark_all_tasks_incomplete,
+    "get_analytics": get_analytics,
+}
+
+# Tools that never write; only batches made up entirely of these may run concurrently
+_READ_ONLY_TOOLS = frozenset({"list_tasks", "get_analytics"})
+
+async def _dispatch_tool(tool_call, user_id: str):
+    """
+    Runs one tool call in a worker thread (the MCP tools use the sync engine).
+    Returns (tool_call_id, result).
+    """
+    fname = tool_call.function.name
+    fn = _TOOL_TABLE.get(fname)
+    if fn is None:
+        return tool_call.id, {"status": "error", "message": f"Tool {fname} not found"}
+
+    args = orjson.loads(tool_call.function.arguments)
+    args['user_id'] = user_id # Inject user_id securely here
+    args.pop('session', None) # Sessions are never model-controlled
+    result = await asyncio.to_thread(fn, **args)
+    return tool_call.id, result
+
+def _format_read_only_result(fname: str, result: Dict[str, Any]) -> Optional[str]:
+    """
+    Builds the assistant reply for read-only tools directly from the tool result.
+    Returns None when the result should go back to the model instead.
+    """
+    if result.get("status") != "success":
+        return None
+
+    if fname == "list_tasks":
+        tasks = result.get("tasks", [])
+        if not tasks:
+            return "You don't have any tasks here yet."
+        lines = []
+        for i, t in enumerate(tasks, 1):
+            priority = getattr(t["priority"], "value", t["priority"])
+            status = getattr(t["status"], "value", t["status"])
+            due_str = f" | Due: {t['due_date'][:10]}" if t.get("due_date") else ""
+            lines.append(f"{i}. {t['title']} [{str(priority).capitalize()}] ({status}){due_str}")
+        return f"Here are your tasks ({len(tasks)}):\n" + "\n".join(lines)
+
+    if fname == "get_analytics":
+        a = result["analytics"]
+        return (
+            f"You have {a['tasks_total']} tasks: {a['tasks_completed']} completed and "
+            f"{a['tasks_pending']} pending. Your productivity score is {a['productivity_score']}%."
+        )
+
+    return None
+
+async def _persist_messages(*chat_messages: ChatMessage) -> None:
+    """
+    Saves one chat turn in a single transaction. Runs as a background task,
+    so failures are retried once and then logged instead of raised.
+    """
+    for attempt in range(2):
+        try:
+            async with AsyncSessionLocal() as session:
+                # One multi-row INSERT instead of a per-object ORM flush
+                await session.exec(insert(ChatMessage), params=[m.model_dump() for m in chat_messages])
+                await session.commit()
+            return
+        except Exception as e:
+            print(f"Chat persistence error (attempt {attempt + 1}): {str(e)}")
+
 # --- CHAT ENDPOINT ---
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Handles user chat, saves to DB, calls OpenAI with tools, returns response.
     """
@@ -194,21 +313,15 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=400, detail="user_id is required")
 
     # A. Setup Database Session & User
-    with Session(sync_engine) as session:
-        try:
-            user_uuid = uuid.UUID(request.user_id)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid user_id format")
+    async with AsyncSessionLocal() as session:
+        user_uuid = _parse_uuid(request.user_id, "Invalid user_id format")
 
-        # B. Get or Create Conversation
+        # B. Get or Create Conversation (a malformed conversation_id starts a new one)
         conv_id = None
-        if request.conversation_id:
-            try:
-                conv_id = uuid.UUID(request.conversation_id)
-                conversation = session.get(Conversation, conv_id)
-                if not conversation:
-                    conv_id = None
-            except ValueError:
+        if request.conversation_id and _UUID_RE.match(request.conversation_id):
+            conv_id = uuid.UUID(request.conversation_id)
+            conversation = await session.get(Conversation, conv_id)
+            if not conversation:
                 conv_id = None
 
         if not conv_id:
@@ -218,121 +331,122 @@ async def chat_endpoint(request: ChatRequest):
                 title=title_text or "New Chat"
             )
             session.add(new_conv)
-            session.commit()
-            session.refresh(new_conv)
+            await session.commit()
+            await session.refresh(new_conv)
             conv_id = new_conv.id
 
-        # C. Save USER Message to DB
+        # C. USER Message (timestamped now, saved together with the reply in the background)
         user_msg_db = ChatMessage(
             conversation_id=conv_id,
             role="user",
-            content=request.message,
-            created_at=datetime.datetime.utcnow()
+            content=request.message
         )
-        session.add(user_msg_db)
-        session.commit()
 
         # D. Build Context
-        from datetime import date
-        today_str = date.today().strftime("%Y-%m-%d")
-        messages = [{"role": "system", "content": SYSTEM_PROMPT.format(current_date=today_str)}]
+        messages = [{"role": "system", "content": _system_prompt_for(datetime.date.today())}]
 
-        # Load history - FIX: Load newest 10, then reverse for chronological order
-        history = session.exec(
+        # Load history - newest 9 saved messages (+ the current one = 10), newest first
+        history = (await session.exec(
             select(ChatMessage)
             .where(ChatMessage.conversation_id == conv_id)
             .order_by(desc(ChatMessage.timestamp)) # Newest first
-            .limit(10)
-        ).all()
-        
-        # Reverse to chronological order (Old -> New)
-        history = history[::-1]
-
-        for h in history:
-            if h.role in ["user", "assistant"]:
-                messages.append({"role": h.role, "content": h.content})
-
-        # E. Call OpenAI (via OpenRouter)
-        tool_calls_executed = False
-        try:
-            completion = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=messages,
-                tools=TOOLS_SCHEMA,
-                tool_choice="auto"
-            )
-            ai_msg = completion.choices[0].message
-            final_resp = ""
-
-            # F. Handle Tool Calls
-            if ai_msg.tool_calls:
-                messages.append(ai_msg)
-                tool_calls_executed = True
-
-                for tool_call in ai_msg.tool_calls:
-                    fname = tool_call.function.name
-                    args = json.loads(tool_call.function.arguments)
-                    args['user_id'] = request.user_id # Inject user_id securely here
-
-                    # Call the appropriate tool
-                    if fname == "add_task":
-                        result = add_task(**args)
-                    elif fname == "update_task":
-                        result = update_task_by_title(**args)
-                    elif fname == "list_tasks":
-                        result = list_tasks(**args)
-                    elif fname == "delete_task":
-                        result = delete_task(**args)
-                    elif fname == "delete_all_tasks":
-                        result = delete_all_tasks(**args)
-                    elif fname == "complete_all_tasks":
-                        result = complete_all_tasks(**args)
-                    elif fname == "mark_all_tasks_incomplete":
-                        result = mark_all_tasks_incomplete(**args)
-                    elif fname == "get_analytics":
-                        result = get_analytics(**args)
-                    else:
-                        result = {"status": "error", "message": f"Tool {fname} not found"}
-
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(result)
-                    })
-
-                # Get final response
-                final_completion = client.chat.completions.create(
+            .limit(9)
+        )).all()
+
+    # Keep the newest messages that fit the token budget, in chronological order (Old -> New)
+    budget = HISTORY_TOKEN_BUDGET - _estimate_tokens(request.message)
+    recent_msgs = deque()
+    for h in history:
+        if h.role not in ("user", "assistant"):
+            continue
+        cost = _estimate_tokens(h.content)
+        if cost > budget:
+            break
+        recent_msgs.appendleft({"role": h.role, "content": h.content})
+        budget -= cost
+    messages.extend(recent_msgs)
+    messages.append({"role": "user", "content": request.message})
+
+    # E. Call OpenAI (via OpenRouter)
+    tool_calls_executed = False
+    try:
+        completion = await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            tools=TOOLS_SCHEMA,
+            tool_choice="auto"
+        )
+        ai_msg = completion.choices[0].message
+        final_resp = ""
+
+        # F. Handle Tool Calls
+        if ai_msg.tool_calls:
+            messages.append(ai_msg)
+            tool_calls_executed = True
+
+            # Read-only lookups are independent and run concurrently; any write
+            # may depend on an earlier call, so mixed batches run in issue order
+            if all(tc.function.name in _READ_ONLY_TOOLS for tc in ai_msg.tool_calls):
+                results = await asyncio.gather(*[
+                    _dispatch_tool(tool_call, str(user_uuid))
+                    for tool_call in ai_msg.tool_calls
+                ])
+            else:
+                results = [
+                    await _dispatch_tool(tool_call, str(user_uuid))
+                    for tool_call in ai_msg.tool_calls
+                ]
+
+            for tool_call_id, result in results:
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": orjson.dumps(result).decode()
+                })
+
+            # Read-only lookups are answered from a server-side template,
+            # skipping the second LLM call entirely
+            templated = None
+            if len(ai_msg.tool_calls) == 1:
+                templated = _format_read_only_result(ai_msg.tool_calls[0].function.name, results[0][1])
+
+            if templated is not None:
+                final_resp = templated
+            else:
+                # Get final response. Same tools as the first call (but none may be
+                # called) so the prompt prefix is identical and provider caches hit
+                final_completion = await client.chat.completions.create(
                     model=OPENAI_MODEL,
-                    messages=messages
+                    messages=messages,
+                    tools=TOOLS_SCHEMA,
+                    tool_choice="none"
                 )
                 final_resp = final_completion.choices[0].message.content
-            else:
-                final_resp = ai_msg.content or "Okay."
-
-        except Exception as e:
-            # Print error to console for debugging
-            print(f"OpenRouter Error: {str(e)}")
-            final_resp = f"I encountered an error processing your request: {str(e)}"
-            tool_calls_executed = False
+        else:
+            final_resp = ai_msg.content or "Okay."
 
-        # G. Save ASSISTANT Message
-        ai_msg_db = ChatMessage(
-            conversation_id=conv_id,
-            role="assistant",
-            content=final_resp or "Processed.",
-            created_at=datetime.datetime.utcnow()
-        )
-        session.add(ai_msg_db)
-        session.commit()
+    except Exception as e:
+        # Print error to console for debugging
+        print(f"OpenRouter Error: {str(e)}")
+        final_resp = f"I encountered an error processing your request: {str(e)}"
+        tool_calls_executed = False
 
-        # H. Return Response
-        return ChatResponse(
-            response=final_resp or "Done.",
-            conversation_id=str(conv_id),
-            user_id=request.user_id,
-            tool_calls_executed=tool_calls_executed,
-            original_request={"message": request.message}
-        )
+    # G. Save USER + ASSISTANT Messages after the response has been sent
+    ai_msg_db = ChatMessage(
+        conversation_id=conv_id,
+        role="assistant",
+        content=final_resp or "Processed."
+    )
+    background_tasks.add_task(_persist_messages, user_msg_db, ai_msg_db)
+
+    # H. Return Response
+    return ChatResponse(
+        response=final_resp or "Done.",
+        conversation_id=str(conv_id),
+        user_id=request.user_id,
+        tool_calls_executed=tool_calls_executed,
+        original_request={"message": request.message}
+    )
 
 # --- CONVERSATION HISTORY ENDPOINTS ---
 class ConversationHistoryResponse(BaseModel):
@@ -345,7 +459,7 @@ class ConversationHistoryResponse(BaseModel):
 def get_conversations(user_id: str):
     if not user_id: raise HTTPException(status_code=400, detail="user_id required")
     with Session(sync_engine) as session:
-        user_uuid = uuid.UUID(user_id)
+        user_uuid = _parse_uuid(user_id)
         conversations = session.exec(select(Conversation).where(Conversation.user_id == user_uuid).order_by(desc(Conversation.updated_at))).all()
         return [ConversationHistoryResponse(id=str(c.id), title=c.title, created_at=c.created_at, updated_at=c.updated_at) for c in conversations]
 
@@ -356,38 +470,38 @@ class ConversationDetailResponse(BaseModel):
     updated_at: datetime.datetime
     messages: List[Dict[str, Any]]
 
-@router.get("/conversations/{conversation_id}", response_model=ConversationDetailResponse)
+@router.get("/conversations/{conversation_id}", response_model=ConversationDetailResponse, response_class=ORJSONResponse)
 def get_conversation_detail(conversation_id: str, user_id: str):
     if not user_id: raise HTTPException(status_code=400, detail="user_id required")
     with Session(sync_engine) as session:
-        try:
-            user_uuid = uuid.UUID(user_id)
-            conv_uuid = uuid.UUID(conversation_id)
-        except ValueError: raise HTTPException(status_code=400, detail="Invalid ID")
+        user_uuid = _parse_uuid(user_id)
+        conv_uuid = _parse_uuid(conversation_id)
         
-        conversation = session.get(Conversation, conv_uuid)
+        # Conversation and its messages (ordered by timestamp) in one joined query
+        conversation = session.exec(
+            select(Conversation)
+            .where(Conversation.id == conv_uuid)
+            .options(joinedload(Conversation.messages))
+        ).unique().first()
         if not conversation or str(conversation.user_id) != user_id: raise HTTPException(status_code=404, detail="Not found")
         
-        messages = session.exec(select(ChatMessage).where(ChatMessage.conversation_id == conv_uuid).order_by(ChatMessage.timestamp.asc())).all()
         return ConversationDetailResponse(
             id=str(conversation.id), title=conversation.title, created_at=conversation.created_at, updated_at=conversation.updated_at,
-            messages=[{"id": str(m.id), "role": m.role, "content": m.content, "timestamp": m.timestamp} for m in messages]
+            messages=[{"id": str(m.id), "role": m.role, "content": m.content, "timestamp": m.timestamp} for m in conversation.messages]
         )
 
 @router.delete("/conversations/{conversation_id}")
 def delete_conversation(conversation_id: str, user_id: str):
     if not user_id: raise HTTPException(status_code=400, detail="user_id required")
     with Session(sync_engine) as session:
-        try:
-            user_uuid = uuid.UUID(user_id)
-            conv_uuid = uuid.UUID(conversation_id)
-        except ValueError: raise HTTPException(status_code=400, detail="Invalid ID")
+        user_uuid = _parse_uuid(user_id)
+        conv_uuid = _parse_uuid(conversation_id)
         
         conversation = session.get(Conversation, conv_uuid)
         if not conversation or str(conversation.user_id) != user_id: raise HTTPException(status_code=404, detail="Not found")
         
-        messages = session.exec(select(ChatMessage).where(ChatMessage.conversation_id == conv_uuid)).all()
-        for m in messages: session.delete(m)
+        # One bulk DELETE for all messages instead of one per row
+        session.exec(delete(ChatMessage).where(ChatMessage.conversation_id == conv_uuid))
         session.delete(conversation)
         session.commit()
         return {"message": "Deleted"}
\ No newline at end of file
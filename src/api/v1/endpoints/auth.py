@@ -7,12 +7,15 @@ from datetime import timedelta
 from src.db.session import get_session
 from src.models.user import User
 from src.schemas.user import UserCreate, UserRead, UserLogin
-from src.core.security import create_access_token, get_password_hash, verify_password
-from ...deps import get_current_user_sync
+from src.core.security import create_access_token, get_password_hash, verify_password, dummy_password_hash, password_needs_rehash
+from ...deps import get_current_user_sync, AuthUser
 from src.core.config import settings
 
 router = APIRouter()
 
+# Compiled once at import; used to reject full names that look like an email address
+_EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def register(user_create: UserCreate, session: Session = Depends(get_session)):
     # Check if user exists
@@ -24,8 +27,7 @@ def register(user_create: UserCreate, session: Session = Depends(get_session)):
         )
 
     # Validate that full_name is not an email address
-    email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-    if user_create.full_name and email_pattern.match(user_create.full_name.strip()):
+    if user_create.full_name and _EMAIL_RE.match(user_create.full_name.strip()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Full name cannot be an email address"
@@ -49,28 +51,31 @@ def login(user_credentials: UserLogin, session: Session = Depends(get_session))
     statement = select(User).where(User.email == user_credentials.email)
     user = session.exec(statement).first()
 
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # Always run one hash verification, whether or not the user exists
+    hashed = user.password_hash if user else dummy_password_hash()
+    password_ok = verify_password(user_credentials.password, hashed)
 
-    if not verify_password(user_credentials.password, user.password_hash):
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Migrate hashes made at another cost to BCRYPT_ROUNDS. Until an account has
+    # logged in once, its wrong-password timing still differs from the dummy hash's.
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = get_password_hash(user_credentials.password)
+        session.commit()
+
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": str(user.id)}, expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserRead)
-def get_current_user_profile(current_user: User = Depends(get_current_user_sync)):
+def get_current_user_profile(current_user: AuthUser = Depends(get_current_user_sync)):
     return current_user
\ No newline at end of file
@@ -5,55 +5,46 @@ from datetime import datetime, timedelta, timezone
 import uuid
 
 from src.db.session import get_session
-from src.models.user import User
 from src.models.task import Task, TaskStatus
 from src.schemas.task import TaskCreate, TaskRead, TaskUpdate, DashboardStats
-from src.api.deps import get_current_user
+from src.api.deps import get_current_user, AuthUser
+from src.utils.stats_cache import get_cached_stats, set_cached_stats, invalidate_stats
 
 router = APIRouter()
 
 # --- NEW STATS ENDPOINT ---
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
+    cached = get_cached_stats(current_user.id)
+    if cached is not None:
+        return cached
+
     # Get current time once to avoid time drift during execution
     # Using timezone-aware datetime for proper comparison
     now = datetime.now(timezone.utc)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     seven_days_later = now + timedelta(days=7)
 
-    # Execute multiple efficient queries in parallel
-    total_tasks = session.exec(
-        select(func.count(Task.id)).where(Task.user_id == current_user.id)
-    ).one()
-
-    completed_tasks = session.exec(
-        select(func.count(Task.id)).where(
-            Task.user_id == current_user.id,
-            Task.status == TaskStatus.completed
-        )
-    ).one()
-
-    completed_today = session.exec(
-        select(func.count(Task.id)).where(
-            Task.user_id == current_user.id,
-            Task.status == TaskStatus.completed,
-            Task.updated_at >= today_start
-        )
-    ).one()
-
-    # Fixed: Compare only date parts for due soon calculation to handle timezone issues
-    # Also ensure due date is not in the past
-    tasks_due_soon = session.exec(
-        select(func.count(Task.id)).where(
-            Task.user_id == current_user.id,
-            Task.status == TaskStatus.pending,
-            Task.due_date != None,
-            Task.due_date >= now,  # Due date should not be in the past
-            Task.due_date <= seven_days_later  # Due date should be within 7 days
-        )
+    # Single round-trip: every count is an aggregate FILTER over the user's tasks
+    # Due soon compares against now so past-due tasks are excluded
+    total_tasks, completed_tasks, completed_today, tasks_due_soon = session.exec(
+        select(
+            func.count(Task.id),
+            func.count(Task.id).filter(Task.status == TaskStatus.completed),
+            func.count(Task.id).filter(
+                Task.status == TaskStatus.completed,
+                Task.updated_at >= today_start
+            ),
+            func.count(Task.id).filter(
+                Task.status == TaskStatus.pending,
+                Task.due_date != None,
+                Task.due_date >= now,  # Due date should not be in the past
+                Task.due_date <= seven_days_later  # Due date should be within 7 days
+            )
+        ).where(Task.user_id == current_user.id)
     ).one()
 
     # Calculate productivity score
@@ -61,18 +52,20 @@ def get_dashboard_stats(
     if total_tasks > 0:
         productivity_score = round((completed_tasks / total_tasks) * 100)
 
-    return DashboardStats(
+    stats = DashboardStats(
         tasks_due_soon=tasks_due_soon,
         completed_today=completed_today,
         productivity_score=productivity_score,
         total_tasks=total_tasks,
         completed_tasks=completed_tasks
     )
+    set_cached_stats(current_user.id, stats)
+    return stats
 # --------------------------
 
 @router.get("/", response_model=List[TaskRead])
 def list_user_tasks(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     tasks = session.exec(select(Task).where(Task.user_id == current_user.id)).all()
@@ -81,7 +74,7 @@ def list_user_tasks(
 @router.post("/", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
 def create_task(
     task_create: TaskCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     db_task = Task(
@@ -91,19 +84,18 @@ def create_task(
         status=task_create.status,
         priority=task_create.priority,
         due_date=task_create.due_date,
-        tags=task_create.tags,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        tags=task_create.tags
     )
     session.add(db_task)
     session.commit()
+    invalidate_stats(current_user.id)
     session.refresh(db_task)
     return db_task
 
 @router.get("/{task_id}", response_model=TaskRead)
 def get_task(
     task_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     task = session.get(Task, task_id)
@@ -117,7 +109,7 @@ def get_task(
 def update_task(
     task_id: uuid.UUID,
     task_update: TaskUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     task = session.get(Task, task_id)
@@ -126,20 +118,20 @@ def update_task(
     if task.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    task_data = task_update.dict(exclude_unset=True)
+    task_data = task_update.model_dump(exclude_unset=True)
     for key, value in task_data.items():
         setattr(task, key, value)
 
-    task.updated_at = datetime.utcnow()
-    session.add(task)
+    # task came from session.get, so it is already tracked; no session.add needed
     session.commit()
+    invalidate_stats(current_user.id)
     session.refresh(task)
     return task
 
 @router.delete("/{task_id}")
 def delete_task(
     task_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     task = session.get(Task, task_id)
@@ -150,4 +142,5 @@ def delete_task(
 
     session.delete(task)
     session.commit()
+    invalidate_stats(current_user.id)
     return {"ok": True}
\ No newline at end of file
@@ -1,35 +1,53 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
-import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 class Settings(BaseSettings):
+    # Values are read from the environment / .env once, when `settings` is created below
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        # This prevents the error "Extra inputs are not permitted"
+        # It allows variables in .env that aren't defined here to simply be ignored.
+        extra="ignore",
+        # Settings are read-only after startup
+        frozen=True,
+    )
+
     # Database settings
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./todo.db")
+    DATABASE_URL: str = "sqlite+aiosqlite:///./todo.db"
+    # Connection pool sizing (PostgreSQL only; applied to both sync and async engines)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 0  # fail fast at pool capacity instead of churning short-lived connections
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    # Log every SQL statement (debugging only)
+    SQL_ECHO: bool = False
 
     # JWT settings
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-key-change-in-production")
-    ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    SECRET_KEY: str = "your-super-secret-key-change-in-production"
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Password hashing: bcrypt work factor (each +1 doubles hash/verify time).
+    # Use the lowest value that meets policy; hashes stored with other costs still verify.
+    BCRYPT_ROUNDS: int = 10
+    # Startup warns when a single hash takes longer than this
+    BCRYPT_TARGET_MS: int = 250
 
     # Better Auth settings
-    BETTER_AUTH_SECRET: str = os.getenv("BETTER_AUTH_SECRET", "your-better-auth-secret-change-in-production")
+    BETTER_AUTH_SECRET: str = "your-better-auth-secret-change-in-production"
+
+    # Deployment environment; "production" skips create_all at startup (schema comes from Alembic)
+    ENV: str = "development"
 
     # Project settings
-    PROJECT_NAME: str = os.getenv("PROJECT_NAME", "Todo App Phase II")
+    PROJECT_NAME: str = "Todo App Phase II"
     API_V1_STR: str = "/api/v1"
 
     # --- 👇 ADD THIS SECTION FOR PHASE 3 👇 ---
     # This tells Pydantic: "It is okay if OPENAI_API_KEY exists in .env, load it here."
-    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
-
-    class Config:
-        env_file = ".env"
-        # This prevents the error "Extra inputs are not permitted"
-        # It allows variables in .env that aren't defined here to simply be ignored.
-        extra = "ignore" 
+    OPENAI_API_KEY: Optional[str] = None
 
 settings = Settings()
\ No newline at end of file
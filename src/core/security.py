@@ -1,7 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import hmac
+import os
+import uuid
+import time
+import bcrypt
 import jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
@@ -12,8 +19,9 @@ from ..schemas.user import TokenData
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Bounded pool for bcrypt work on async paths: hashing is CPU-bound, so more
+# threads than cores only adds contention during login bursts
+_hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
 
 # JWT authentication scheme
 security = HTTPBearer()
@@ -31,26 +39,89 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+# Decoder with options bound once; every token must carry "exp" and "sub"
+_jwt_decoder = jwt.PyJWT(options={"require": ["exp", "sub"]})
+_jwt_algorithms = [settings.ALGORITHM]
+
+
+@functools.lru_cache(maxsize=4096)
+def _decode_token(token: str) -> dict:
+    # Signature check + JSON parse, done once per distinct token (failures are not cached)
+    return _jwt_decoder.decode(token, settings.SECRET_KEY, algorithms=_jwt_algorithms)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Returns the validated JWT payload. The decode is cached per token string,
+    so expiry is re-checked here on every call.
+    """
+    payload = _decode_token(token)
+    if payload["exp"] <= time.time():
+        raise jwt.exceptions.ExpiredSignatureError("Signature has expired")
+    return payload
+
+
+def secure_equal(a: str, b: str) -> bool:
+    """
+    Constant-time string comparison. Use this (never ==) whenever a token, API key
+    or other secret is matched, so response timing doesn't leak how many characters matched.
+    """
+    return hmac.compare_digest(a.encode(), b.encode())
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    # The cost is read from the stored hash, so hashes made with other rounds still verify
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    # Work factor is configurable via BCRYPT_ROUNDS
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode(), salt).decode()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True when a stored hash was made at a cost other than BCRYPT_ROUNDS (e.g. the
+    old passlib default of 12); login re-hashes those so all accounts converge.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+@functools.lru_cache(maxsize=1)
+def dummy_password_hash() -> str:
+    """
+    Hash verified against when a login email is unknown, so a miss costs the same
+    as a wrong password. Computed on first use (or by the startup warm-up), not at import.
+    """
+    return get_password_hash("x" * 16)
+
+
+def measure_password_hash_ms() -> float:
+    """Times one hash at the configured BCRYPT_ROUNDS (used for the startup check)."""
+    start = time.perf_counter()
+    get_password_hash("calibration-password")
+    return (time.perf_counter() - start) * 1000
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    # Runs bcrypt off the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
 
 
 async def authenticate_user(session: AsyncSession, email: str, password: str) -> Optional[User]:
     # Find user by email
     statement = select(User).where(User.email == email)
-    result = await session.execute(statement)
-    user = result.first()
+    user = (await session.scalars(statement)).first()
 
     if user is None:
         return None
 
-    user = user[0]  # Get the User object from the tuple
-
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
 
     return user
@@ -67,21 +138,18 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
+        payload = decode_access_token(token.credentials)
+        user_id: str = payload.get("sub")
+        if user_id is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except jwt.exceptions.PyJWTError:
+        token_data = TokenData(user_id=uuid.UUID(user_id))
+    except (jwt.exceptions.PyJWTError, ValueError):
         raise credentials_exception
 
-    statement = select(User).where(User.email == token_data.username)
-    result = await session.execute(statement)
-    user = result.first()
+    # Primary-key lookup (served from the identity map when already loaded)
+    user = await session.get(User, token_data.user_id)
 
     if user is None:
         raise credentials_exception
 
-    return user[0]  # Return the User object from the tuple
\ No newline at end of file
+    return user
\ No newline at end of file
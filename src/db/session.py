@@ -1,8 +1,12 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
 import os
+import asyncio
+from contextlib import ExitStack
 
 # Helper function to ensure URL format is correct
 def get_db_url():
@@ -15,17 +19,39 @@ db_url = get_db_url()
 
 # --- CONFIGURATION FOR SQLITE ---
 if db_url.startswith("sqlite"):
-    # SQLite only supports Sync engine easily
+    # Sync engine must not use the async driver
+    sync_url = db_url.replace("+aiosqlite", "")
     sync_engine = create_engine(
-        db_url,
-        echo=True,
+        sync_url,
+        echo=settings.SQL_ECHO,
+        connect_args={"check_same_thread": False}
+    )
+
+    # Async engine (aiosqlite) for async endpoints
+    async_url = sync_url.replace("sqlite://", "sqlite+aiosqlite://")
+    async_engine = create_async_engine(
+        async_url,
+        echo=settings.SQL_ECHO,
         connect_args={"check_same_thread": False}
     )
 
+    AsyncSessionLocal = sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
     def get_session():
         with Session(sync_engine) as session:
             yield session
 
+    async def get_async_session():
+        async with AsyncSessionLocal() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+
 # --- CONFIGURATION FOR POSTGRESQL (NEON) ---
 else:
     # 1. SETUP SYNC ENGINE (Required for creating tables on startup)
@@ -37,10 +63,13 @@ else:
     # Create the Sync Engine (uses psycopg2-binary)
     sync_engine = create_engine(
         sync_url,
-        echo=True,
+        echo=settings.SQL_ECHO,
         pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        # Batch executemany() into multi-row statements (psycopg2)
+        executemany_mode="values_plus_batch"
     )
 
     # 2. SETUP ASYNC ENGINE (For async endpoints)
@@ -49,10 +78,11 @@ else:
 
     async_engine = create_async_engine(
         async_url,
-        echo=True,
+        echo=settings.SQL_ECHO,
         pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
     )
 
     # Async Session Factory
@@ -67,10 +97,43 @@ else:
         with Session(sync_engine) as session:
             yield session
 
-    # Dependency: Get Async Session (Available for future use)
+    # Dependency: Get Async Session (used by async endpoints)
     async def get_async_session():
         async with AsyncSessionLocal() as session:
             try:
                 yield session
             finally:
-                await session.close()
\ No newline at end of file
+                await session.close()
+
+# Shared sync session factory (used by the MCP tools)
+SyncSessionLocal = sessionmaker(
+    bind=sync_engine,
+    class_=Session,
+    expire_on_commit=False
+)
+
+
+async def prewarm_pools() -> None:
+    """
+    Opens DB_POOL_SIZE connections on both engines at startup so the first
+    requests don't pay connect/TLS latency. No-op for SQLite.
+    """
+    if db_url.startswith("sqlite"):
+        return
+
+    async def touch_async():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    def warm_sync():
+        # Hold every connection until all are open; returning each one right
+        # away would let the next checkout reuse it instead of opening a new one
+        with ExitStack() as stack:
+            for _ in range(settings.DB_POOL_SIZE):
+                stack.enter_context(sync_engine.connect()).execute(text("SELECT 1"))
+
+    # The async checkouts overlap while they wait on connect I/O
+    await asyncio.gather(
+        *[touch_async() for _ in range(settings.DB_POOL_SIZE)],
+        asyncio.to_thread(warm_sync),
+    )
\ No newline at end of file
@@ -1,12 +1,20 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .api.v1.api import router as api_router
-from .api.v1.endpoints.agent import router as agent_router
+from .api.v1.endpoints.agent import router as agent_router, http_client as llm_http_client
 import os
 from dotenv import load_dotenv
+from pathlib import Path
 from sqlmodel import SQLModel
-from .db.session import sync_engine
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from .db.session import sync_engine, prewarm_pools
+from .core.config import settings
+from .core.security import measure_password_hash_ms, dummy_password_hash
 from .models.user import User
 from .models.task import Task
 
@@ -17,18 +25,48 @@ load_dotenv()
 def create_db_and_tables():
     SQLModel.metadata.create_all(sync_engine)
 
+# Production relies on Alembic, so refuse to start on a database that isn't at head
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+def ensure_schema_at_head():
+    config = Config(str(ALEMBIC_DIR.parent / "alembic.ini"))
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with sync_engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(heads)}. "
+            "Run `alembic upgrade head` before starting with ENV=production."
+        )
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables on startup
-    create_db_and_tables()
+    # Precompute the dummy login hash and prepare the schema in parallel worker
+    # threads. In production the schema is managed by Alembic and only checked.
+    startup_jobs = [asyncio.to_thread(dummy_password_hash)]
+    if settings.ENV == "production":
+        startup_jobs.append(asyncio.to_thread(ensure_schema_at_head))
+    else:
+        startup_jobs.append(asyncio.to_thread(create_db_and_tables))
+    await asyncio.gather(*startup_jobs)
+    await prewarm_pools()
+
+    # Report the real cost of the configured bcrypt work factor on this host
+    hash_ms = await asyncio.to_thread(measure_password_hash_ms)
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS}: {hash_ms:.0f} ms per hash")
+    if hash_ms > settings.BCRYPT_TARGET_MS:
+        print(f"WARNING: password hashing exceeds the {settings.BCRYPT_TARGET_MS} ms target; consider lowering BCRYPT_ROUNDS")
     yield
-    # Cleanup on shutdown if needed
+    # Close pooled connections to the LLM provider
+    await llm_http_client.aclose()
 
 app = FastAPI(
     title="Professional Todo Manager API",
     description="API for the Professional Todo Manager backend service",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware to allow requests from localhost:3000
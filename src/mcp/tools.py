@@ -1,32 +1,61 @@
-from sqlmodel import Session, select, desc
+from sqlmodel import Session, select, desc, func
+from sqlalchemy import delete, update
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, List
 import datetime as dt
 from uuid import UUID
 import uuid
 
-from ..models.task import Task
+from ..models.task import Task, TaskStatus
 from ..models.user import User
-from ..db.session import sync_engine
+from ..db.session import SyncSessionLocal
+from ..utils.stats_cache import invalidate_stats
+
+@contextmanager
+def _session_scope(session: Optional[Session] = None):
+    """
+    Every tool accepts an optional session so callers that already hold one can reuse it.
+    Without one, a session is opened from the shared factory and closed afterwards.
+    """
+    if session is not None:
+        yield session
+    else:
+        with SyncSessionLocal() as new_session:
+            new_session.info["owned_by_tool"] = True
+            yield new_session
+
+def _commit(session: Session):
+    """Commits a session the tool opened; an injected session is only flushed and its owner commits."""
+    if session.info.get("owned_by_tool"):
+        session.commit()
+    else:
+        session.flush()
+
+def _parse_due_date(due_date: str) -> Optional[datetime]:
+    """YYYY-MM-DD -> midnight datetime (C-level fromisoformat); None if malformed."""
+    try:
+        return datetime.combine(dt.date.fromisoformat(due_date), dt.time.min)
+    except ValueError:
+        return None
 
 # --- 1. CORE TASK FUNCTIONS ---
 
 def add_task(user_id: str, title: str, description: Optional[str] = None,
-             priority: str = "medium", due_date: Optional[str] = None, tags: Optional[str] = None):
-    with Session(sync_engine) as session:
+             priority: str = "medium", due_date: Optional[str] = None, tags: Optional[str] = None,
+             session: Optional[Session] = None):
+    with _session_scope(session) as session:
         if not user_id: raise ValueError("user_id is required")
         
-        parsed_date = None
-        if due_date:
-            try: parsed_date = dt.datetime.strptime(due_date, "%Y-%m-%d")
-            except: pass
+        parsed_date = _parse_due_date(due_date) if due_date else None
             
         task = Task(
             user_id=user_id, title=title, description=description, priority=priority, 
             due_date=parsed_date, tags=tags, status="pending"
         )
         session.add(task)
-        session.commit()
+        _commit(session)
+        invalidate_stats(user_id)
         session.refresh(task)
         
         return {
@@ -35,19 +64,22 @@ def add_task(user_id: str, title: str, description: Optional[str] = None,
             "task": {"id": str(task.id), "title": task.title}
         }
 
-def list_tasks(user_id: str, status: Optional[str] = None):
-    with Session(sync_engine) as session:
+def list_tasks(user_id: str, status: Optional[str] = None, session: Optional[Session] = None):
+    with _session_scope(session) as session:
         if not user_id: raise ValueError("user_id is required")
         
-        query = select(Task).where(Task.user_id == user_id)
+        # Only the columns returned below (no description/tags, no ORM objects)
+        query = select(
+            Task.id, Task.title, Task.priority, Task.status, Task.due_date, Task.created_at
+        ).where(Task.user_id == user_id)
         if status and status != "all": 
             query = query.where(Task.status == status)
         
         # FIX: Order by newest first so the list is stable
-        tasks = session.exec(query.order_by(desc(Task.created_at))).all()
+        rows = session.exec(query.order_by(desc(Task.created_at))).all()
         
         task_list = []
-        for t in tasks:
+        for t in rows:
             task_list.append({
                 "id": str(t.id),
                 "title": t.title,
@@ -60,11 +92,12 @@ def list_tasks(user_id: str, status: Optional[str] = None):
         return {"status": "success", "tasks": task_list}
 
 # --- IMPROVED DELETE FUNCTION ---
-def delete_task(user_id: str, task_title: Optional[str] = None, task_id: Optional[str] = None):
+def delete_task(user_id: str, task_title: Optional[str] = None, task_id: Optional[str] = None,
+                session: Optional[Session] = None):
     """
     Delete a task. Handles duplicates by asking for clarification with a numbered list.
     """
-    with Session(sync_engine) as session:
+    with _session_scope(session) as session:
         if not user_id: raise ValueError("user_id is required")
         if not task_title and not task_id:
             return {"status": "error", "message": "Please provide either a task title or task ID."}
@@ -80,7 +113,8 @@ def delete_task(user_id: str, task_title: Optional[str] = None, task_id: Optiona
             
             title_backup = task.title
             session.delete(task)
-            session.commit()
+            _commit(session)
+            invalidate_stats(user_id)
             return {"status": "success", "message": f"Task '{title_backup}' deleted."}
 
         # 2. Delete by Title (Smart Duplicate Check)
@@ -98,7 +132,8 @@ def delete_task(user_id: str, task_title: Optional[str] = None, task_id: Optiona
             
             if len(tasks) == 1:
                 session.delete(tasks[0])
-                session.commit()
+                _commit(session)
+                invalidate_stats(user_id)
                 return {"status": "success", "message": f"Task '{task_title}' deleted."}
             
             # Found duplicates: Return a Numbered List
@@ -122,67 +157,93 @@ def delete_task(user_id: str, task_title: Optional[str] = None, task_id: Optiona
 
 def update_task_by_title(user_id: str, current_title: str, new_title: str = None, 
                          description: str = None, priority: str = None, status: str = None, 
-                         due_date: str = None, tags: str = None):
-    with Session(sync_engine) as session:
+                         due_date: str = None, tags: str = None, session: Optional[Session] = None):
+    with _session_scope(session) as session:
         if not user_id or not current_title: return {"status": "error", "message": "Missing fields"}
         
-        # Check for multiple tasks with same title before updating
-        tasks = session.exec(select(Task).where(Task.user_id == user_id, Task.title == current_title)).all()
-        if not tasks: return {"status": "error", "message": "Task not found."}
-        if len(tasks) > 1:
-             return {"status": "error", "message": f"Found {len(tasks)} tasks named '{current_title}'. Please rename them via ID first or delete the duplicates."}
-
-        task = tasks[0]
-        
-        if new_title: task.title = new_title
-        if description: task.description = description
-        if priority: task.priority = priority
-        if status: task.status = status
-        if tags: task.tags = tags
+        changes = {}
+        if new_title: changes["title"] = new_title
+        if description: changes["description"] = description
+        if priority: changes["priority"] = priority
+        if status: changes["status"] = status
+        if tags: changes["tags"] = tags
         if due_date: 
-            try: task.due_date = dt.datetime.strptime(due_date, "%Y-%m-%d")
-            except: pass
-            
-        task.updated_at = dt.datetime.utcnow()
-        session.add(task)
-        session.commit()
-        return {"status": "success", "message": f"Task '{current_title}' updated.", "task": {"title": task.title}}
+            parsed_date = _parse_due_date(due_date)
+            if parsed_date: changes["due_date"] = parsed_date
+        # updated_at is set by the column's onupdate; an empty SET would list every column
+        if not changes: return {"status": "error", "message": "No changes provided."}
+
+        # One UPDATE ... RETURNING that only applies when the title is unique for this
+        # user, so a duplicate match writes nothing and there is nothing to roll back
+        match = (Task.user_id == user_id, Task.title == current_title)
+        match_count = select(func.count()).select_from(Task).where(*match)
+        updated = session.exec(
+            update(Task)
+            .where(*match, match_count.scalar_subquery() == 1)
+            .values(**changes)
+            .returning(Task.title)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not updated:
+            found = session.exec(match_count).one()
+            if not found: return {"status": "error", "message": "Task not found."}
+            return {"status": "error", "message": f"Found {found} tasks named '{current_title}'. Please rename them via ID first or delete the duplicates."}
+
+        _commit(session)
+        invalidate_stats(user_id)
+        return {"status": "success", "message": f"Task '{current_title}' updated.", "task": {"title": updated[0].title}}
 
 # --- 2. ANALYTICS ---
 
-def get_analytics(user_id: str):
-    with Session(sync_engine) as session:
-        tasks = session.exec(select(Task).where(Task.user_id == user_id)).all()
-        total = len(tasks)
-        completed = len([t for t in tasks if t.status == "completed"])
-        pending = len([t for t in tasks if t.status == "pending"])
+def get_analytics(user_id: str, session: Optional[Session] = None):
+    with _session_scope(session) as session:
+        # Counted in the database: one row of three integers instead of every task
+        total, completed, pending = session.exec(
+            select(
+                func.count(Task.id),
+                func.count(Task.id).filter(Task.status == "completed"),
+                func.count(Task.id).filter(Task.status == "pending")
+            ).where(Task.user_id == user_id)
+        ).one()
         score = int((completed / total * 100) if total > 0 else 0)
         
         return {"status": "success", "analytics": {"tasks_total": total, "tasks_completed": completed, "tasks_pending": pending, "productivity_score": score}}
 
 # --- 3. BULK ACTIONS ---
-
-def delete_all_tasks(user_id: str):
-    with Session(sync_engine) as session:
-        tasks = session.exec(select(Task).where(Task.user_id == user_id)).all()
-        for t in tasks: session.delete(t)
-        session.commit()
-        return {"status": "success", "message": f"Deleted {len(tasks)} tasks."}
-
-def complete_all_tasks(user_id: str):
-    with Session(sync_engine) as session:
-        tasks = session.exec(select(Task).where(Task.user_id == user_id)).all()
-        for t in tasks: 
-            t.status = "completed"
-            session.add(t)
-        session.commit()
-        return {"status": "success", "message": "All tasks marked completed."}
-
-def mark_all_tasks_incomplete(user_id: str):
-    with Session(sync_engine) as session:
-        tasks = session.exec(select(Task).where(Task.user_id == user_id)).all()
-        for t in tasks: 
-            t.status = "pending"
-            session.add(t)
-        session.commit()
-        return {"status": "success", "message": "All tasks marked pending."}
\ No newline at end of file
+# Single set-based statements: no rows are loaded or tracked by the session
+
+def delete_all_tasks(user_id: str, session: Optional[Session] = None):
+    with _session_scope(session) as session:
+        result = session.exec(
+            delete(Task)
+            .where(Task.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        _commit(session)
+        invalidate_stats(user_id)
+        return {"status": "success", "message": f"Deleted {result.rowcount} tasks."}
+
+def complete_all_tasks(user_id: str, session: Optional[Session] = None):
+    with _session_scope(session) as session:
+        # Skip rows already completed so their updated_at (and completed_today) is untouched
+        result = session.exec(
+            update(Task)
+            .where(Task.user_id == user_id, Task.status != TaskStatus.completed)
+            .values(status="completed")
+            .execution_options(synchronize_session=False)
+        )
+        _commit(session)
+        invalidate_stats(user_id)
+        return {"status": "success", "message": f"Marked {result.rowcount} tasks completed."}
+
+def mark_all_tasks_incomplete(user_id: str, session: Optional[Session] = None):
+    with _session_scope(session) as session:
+        result = session.exec(
+            update(Task)
+            .where(Task.user_id == user_id, Task.status != TaskStatus.pending)
+            .values(status="pending")
+            .execution_options(synchronize_session=False)
+        )
+        _commit(session)
+        invalidate_stats(user_id)
+        return {"status": "success", "message": f"Marked {result.rowcount} tasks pending."}
\ No newline at end of file
@@ -0,0 +1,15 @@
+from typing import Any
+from sqlmodel import Field
+from sqlalchemy import func
+
+
+def db_timestamp(onupdate: bool = False) -> Any:
+    """
+    Timestamp field whose value comes from the database clock. default=now() puts
+    now() in the INSERT itself, so tables created before the server default existed
+    still get a value; server_default covers rows written outside the ORM.
+    """
+    sa_column_kwargs = {"default": func.now(), "server_default": func.now()}
+    if onupdate:
+        sa_column_kwargs["onupdate"] = func.now()
+    return Field(default=None, nullable=False, sa_column_kwargs=sa_column_kwargs)
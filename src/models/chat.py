@@ -2,6 +2,8 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
+from ._columns import db_timestamp
 
 # --- 1. CONVERSATION MODEL ---
 class Conversation(SQLModel, table=True):
@@ -10,16 +12,24 @@ class Conversation(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(index=True)
     title: str = Field(default="New Chat", max_length=200)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = db_timestamp()
+    updated_at: Optional[datetime] = db_timestamp(onupdate=True)
 
     # Relationship: One Conversation has many Messages
-    messages: List["ChatMessage"] = Relationship(back_populates="conversation")
+    # lazy="raise": load explicitly (joinedload/selectinload) instead of N+1 lazy loads
+    messages: List["ChatMessage"] = Relationship(
+        back_populates="conversation",
+        sa_relationship_kwargs={"order_by": "ChatMessage.timestamp", "lazy": "raise"}
+    )
 
 
 # --- 2. CHAT MESSAGE MODEL ---
 class ChatMessage(SQLModel, table=True):
     __tablename__ = "chat_messages"  # Explicit table name
+    # Serves "latest N messages of a conversation" (a B-tree scans backwards for DESC)
+    __table_args__ = (
+        Index("ix_chat_messages_conversation_timestamp", "conversation_id", "timestamp"),
+    )
     
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     conversation_id: uuid.UUID = Field(foreign_key="conversations.id", index=True)
@@ -28,8 +38,13 @@ class ChatMessage(SQLModel, table=True):
     role: str = Field(default="user") 
     
     content: str = Field(max_length=10000)
+    # Set client-side: a user/assistant pair is inserted in one transaction, and a
+    # transaction-scoped now() would give both the same value and lose their order
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     tool_call_id: Optional[str] = Field(default=None)
 
     # Relationship: Many Messages belong to one Conversation
-    conversation: Optional[Conversation] = Relationship(back_populates="messages")
\ No newline at end of file
+    conversation: Optional[Conversation] = Relationship(
+        back_populates="messages",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
\ No newline at end of file
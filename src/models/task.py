@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
+from ._columns import db_timestamp
 from typing import Optional
 from datetime import datetime
 import uuid
@@ -19,6 +21,14 @@ class TaskPriority(str, Enum):
 
 class Task(SQLModel, table=True):
     __tablename__ = "tasks"
+    # Composite indexes for the per-user filters/orderings used by the endpoints and MCP tools
+    __table_args__ = (
+        Index("ix_tasks_user_created", "user_id", "created_at"),
+        Index("ix_tasks_user_status_created", "user_id", "status", "created_at"),
+        Index("ix_tasks_user_title", "user_id", "title"),
+        Index("ix_tasks_user_due_date", "user_id", "due_date"),
+        Index("ix_tasks_user_updated_at", "user_id", "updated_at"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="users.id", nullable=False)
@@ -32,8 +42,11 @@ class Task(SQLModel, table=True):
     tags: Optional[str] = Field(default=None, nullable=True)
     # ------------------------
 
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    created_at: Optional[datetime] = db_timestamp()
+    updated_at: Optional[datetime] = db_timestamp(onupdate=True)
 
-    # Relationship to user
-    user: Optional["User"] = Relationship(back_populates="tasks")
\ No newline at end of file
+    # Relationship to user (lazy="raise": load explicitly with selectinload/joinedload)
+    user: Optional["User"] = Relationship(
+        back_populates="tasks",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
\ No newline at end of file
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from ._columns import db_timestamp
 from typing import Optional, List
 from datetime import datetime
 import uuid
@@ -12,11 +13,14 @@ class User(SQLModel, table=True):
     email: str = Field(unique=True, index=True, nullable=False)
     password_hash: str = Field(nullable=False)
     full_name: str = Field(nullable=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-
-    # Relationship to tasks
-    tasks: List["Task"] = Relationship(back_populates="user")
+    created_at: Optional[datetime] = db_timestamp()
+    updated_at: Optional[datetime] = db_timestamp(onupdate=True)
+
+    # Relationship to tasks (lazy="raise": load explicitly, e.g. options(selectinload(User.tasks)))
+    tasks: List["Task"] = Relationship(
+        back_populates="user",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
 
 
 # Pydantic models for API
@@ -34,4 +34,4 @@ class Token(SQLModel):
 
 
 class TokenData(SQLModel):
-    username: Optional[str] = None
\ No newline at end of file
+    user_id: Optional[uuid.UUID] = None
\ No newline at end of file
@@ -0,0 +1,33 @@
+import threading
+from typing import Optional, Union
+from uuid import UUID
+from cachetools import TTLCache
+
+from ..schemas.task import DashboardStats
+
+# Dashboard stats are polled by the UI; serve repeats from memory for a few
+# seconds and drop a user's entry whenever their tasks change.
+STATS_CACHE_TTL = 5
+
+_stats_cache: TTLCache = TTLCache(maxsize=10000, ttl=STATS_CACHE_TTL)
+_stats_cache_lock = threading.Lock()
+
+
+def _key(user_id: Union[UUID, str]) -> str:
+    # Canonical lowercase form, so "ABC..." and UUID("abc...") share one entry
+    return str(user_id).lower()
+
+
+def get_cached_stats(user_id: Union[UUID, str]) -> Optional[DashboardStats]:
+    with _stats_cache_lock:
+        return _stats_cache.get(_key(user_id))
+
+
+def set_cached_stats(user_id: Union[UUID, str], stats: DashboardStats) -> None:
+    with _stats_cache_lock:
+        _stats_cache[_key(user_id)] = stats
+
+
+def invalidate_stats(user_id: Union[UUID, str]) -> None:
+    with _stats_cache_lock:
+        _stats_cache.pop(_key(user_id), None)
\ No newline at end of file